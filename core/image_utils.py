@@ -1,5 +1,6 @@
 """Image utilities."""
 
+import numpy as np
 from PIL import Image, ImageDraw
 from typing import Tuple
 
@@ -38,3 +39,25 @@ class ImageRenderer:
     def ensure_rgb(image: Image.Image) -> Image.Image:
         """Convert image to RGB."""
         return image.convert('RGB') if image.mode != 'RGB' else image
+    
+    @staticmethod
+    def to_palette(image: Image.Image) -> Image.Image:
+        """
+        Losslessly convert to palette ("P") mode when the image has at most 256 colors.
+        
+        Images with more colors are returned as RGB unchanged.
+        """
+        image = ImageRenderer.ensure_rgb(image)
+        if image.getcolors(256) is None:
+            return image
+        
+        # Map colors to indices exactly; Image.quantize() matches against a
+        # reduced-precision color cache and can shift near-identical colors.
+        # Packing each pixel into one integer keeps np.unique a fast 1-D sort.
+        pixels = np.asarray(image).reshape(-1, 3).astype(np.uint32)
+        packed = (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+        colors, indices = np.unique(packed, return_inverse=True)
+        palette = np.stack([colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=-1)
+        palette_image = Image.frombytes("P", image.size, indices.astype(np.uint8).tobytes())
+        palette_image.putpalette(palette.astype(np.uint8).tobytes())
+        return palette_image
@@ -10,9 +10,16 @@ from .image_utils import ImageRenderer
 class OutputWriter:
     """Writes tasks to standard folder structure."""
     
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, palette_images: bool = False):
+        """
+        Args:
+            output_dir: Root directory for the task folders
+            palette_images: Save frames as 8-bit palette PNGs when they have at
+                most 256 colors (lossless, smaller files)
+        """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.palette_images = palette_images
     
     def write_task_pair(self, task_pair: TaskPair) -> Path:
         """Write single task to disk."""
@@ -20,10 +27,10 @@ class OutputWriter:
         task_dir.mkdir(parents=True, exist_ok=True)
         
         # Write images
-        ImageRenderer.ensure_rgb(task_pair.first_image).save(task_dir / "first_frame.png")
+        self._prepare_image(task_pair.first_image).save(task_dir / "first_frame.png")
         
         if task_pair.final_image:
-            ImageRenderer.ensure_rgb(task_pair.final_image).save(task_dir / "final_frame.png")
+            self._prepare_image(task_pair.final_image).save(task_dir / "final_frame.png")
         
         # Write prompt
         (task_dir / "prompt.txt").write_text(task_pair.prompt)
@@ -36,6 +43,12 @@ class OutputWriter:
         
         return task_dir
     
+    def _prepare_image(self, image):
+        """Convert an image to the mode it is saved in."""
+        if self.palette_images:
+            return ImageRenderer.to_palette(image)
+        return ImageRenderer.ensure_rgb(image)
+    
     def write_dataset(self, task_pairs: List[TaskPair]) -> Path:
         """Write all tasks to disk."""
         for pair in task_pairs:
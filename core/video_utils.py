@@ -1,8 +1,10 @@
 """Video generation utilities - Generic framework code (DO NOT MODIFY)."""
 
+import itertools
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterable, List, Tuple, Optional, Union
 from PIL import Image
+from .image_utils import ImageRenderer
 
 # Check if cv2 is available
 import importlib.util
@@ -55,27 +57,37 @@ class VideoGenerator:
     
     def create_video_from_frames(
         self,
-        frames: List[Image.Image],
+        frames: Iterable[Union[Image.Image, "np.ndarray"]],
         output_path: Path,
-        size: Optional[Tuple[int, int]] = None
+        size: Optional[Tuple[int, int]] = None,
+        channel_order: str = "rgb"
     ) -> Path:
         """
-        Create video from PIL Image frames.
+        Create video from PIL Image or RGB numpy array frames.
+        
+        Frames are encoded one at a time, so a generator can stream them
+        without holding the whole clip in memory. Arrays (H, W, 3 uint8, RGB)
+        are encoded without a round trip through PIL.
         
         Args:
-            frames: List of PIL Images
+            frames: PIL Images and/or RGB arrays (a list or any other iterable)
             output_path: Path to save video (extension will be corrected)
             size: Optional (width, height) tuple. If None, uses first frame size
+            channel_order: Channel order of array frames - "rgb" (default) or
+                "bgr" to write them without a color conversion. PIL Images
+                are always treated as RGB.
             
         Returns:
             Path to created video file
         """
-        if not frames:
+        frames = iter(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
             raise ValueError("No frames provided")
         
         # Get video size
         if size is None:
-            size = frames[0].size
+            size = self._frame_size(first_frame)
         
         width, height = size
         
@@ -95,21 +107,34 @@ class VideoGenerator:
         )
         
         # Write frames
-        for frame in frames:
-            # Ensure RGB and correct size
-            if frame.size != size:
-                frame = frame.resize(size, Image.Resampling.LANCZOS)
+        for frame in itertools.chain([first_frame], frames):
+            is_bgr = False
+            if isinstance(frame, np.ndarray):
+                frame_array = frame
+                if self._frame_size(frame) != size:
+                    frame_array = cv2.resize(frame_array, size, interpolation=cv2.INTER_LANCZOS4)
+                is_bgr = channel_order == "bgr"
+            else:
+                # Ensure RGB and correct size
+                if frame.size != size:
+                    frame = frame.resize(size, Image.Resampling.LANCZOS)
+                frame_array = np.asarray(ImageRenderer.ensure_rgb(frame))
             
-            # Convert PIL Image to OpenCV format (BGR)
-            frame_rgb = frame.convert('RGB')
-            frame_array = np.array(frame_rgb)
-            frame_bgr = cv2.cvtColor(frame_array, cv2.COLOR_RGB2BGR)
+            # Convert RGB to OpenCV format (BGR)
+            frame_bgr = frame_array if is_bgr else cv2.cvtColor(frame_array, cv2.COLOR_RGB2BGR)
             
             writer.write(frame_bgr)
         
         writer.release()
         return output_path
     
+    @staticmethod
+    def _frame_size(frame: Union[Image.Image, "np.ndarray"]) -> Tuple[int, int]:
+        """Return (width, height) of a PIL Image or numpy array frame."""
+        if isinstance(frame, np.ndarray):
+            return frame.shape[1], frame.shape[0]
+        return frame.size
+    
     def create_crossfade_video(
         self,
         start_image: Image.Image,
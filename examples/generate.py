@@ -10,6 +10,7 @@
 Usage:
     python examples/generate.py --num-samples 100
     python examples/generate.py --num-samples 100 --output data/my_task --seed 42
+    python examples/generate.py --num-samples 1000 --workers 0
 """
 
 import argparse
@@ -56,6 +57,17 @@ Examples:
         action="store_true",
         help="Disable video generation"
     )
+    parser.add_argument(
+        "--palette-images",
+        action="store_true",
+        help="Save frames as lossless 8-bit palette PNGs (smaller files)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for rendering tasks; 0 uses all CPU cores (default: 1)"
+    )
     
     args = parser.parse_args()
     
@@ -71,6 +83,7 @@ Examples:
         random_seed=args.seed,
         output_dir=Path(args.output),
         generate_videos=not args.no_videos,
+        num_workers=args.workers or None,
     )
     
     # Generate tasks
@@ -78,7 +91,7 @@ Examples:
     tasks = generator.generate_dataset()
     
     # Write to disk
-    writer = OutputWriter(Path(args.output))
+    writer = OutputWriter(Path(args.output), palette_images=args.palette_images)
     writer.write_dataset(tasks)
     
     print(f"✅ Done! Generated {len(tasks)} tasks in {args.output}/{config.domain}_task/")
@@ -7,6 +7,7 @@
 ╚══════════════════════════════════════════════════════════════════════════════╝
 """
 
+from typing import Optional
 from pydantic import Field
 from core import GenerationConfig
 
@@ -47,6 +48,15 @@ class TaskConfig(GenerationConfig):
         description="Video frame rate"
     )
     
+    # ══════════════════════════════════════════════════════════════════════════
+    #  PERFORMANCE SETTINGS
+    # ══════════════════════════════════════════════════════════════════════════
+    
+    num_workers: Optional[int] = Field(
+        default=1,
+        description="Worker processes for rendering tasks (1 = serial, None = all CPU cores)"
+    )
+    
     # ══════════════════════════════════════════════════════════════════════════
     #  TASK-SPECIFIC SETTINGS
     # ══════════════════════════════════════════════════════════════════════════
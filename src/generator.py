@@ -8,12 +8,17 @@
 ╚══════════════════════════════════════════════════════════════════════════════╝
 """
 
+import os
 import random
 import tempfile
 import math
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
 
 from core import BaseGenerator, TaskPair, ImageRenderer
 from core.video_utils import VideoGenerator
@@ -21,6 +26,59 @@ from .config import TaskConfig
 from .prompts import get_prompt
 
 
+# Cached shape stamp: (ink, boolean mask array) layers and their offset from
+# the shape center. An ink of None is filled with the shape color
+# at draw time.
+ShapeStamp = Tuple[List[Tuple[Optional[Tuple[int, int, int]], np.ndarray]], Tuple[int, int]]
+
+class TwoStepTaskData(NamedTuple):
+    """Parameters of one A→B→C :: D→?→? task, with colors and sizes resolved."""
+    # Example sequence: A → B → C
+    shape_a: str  # Original
+    shape_b: str  # After step 1 (color change)
+    shape_c: str  # After step 2 (scale change)
+    # Question sequence: D → ? → ?
+    shape_d: str  # Original
+    shape_e: str  # After step 1 (color change) - first ?
+    shape_f: str  # After step 2 (scale change) - second ?
+    color_from: str
+    color_to: str
+    scale_from: str
+    scale_to: str
+    # Resolved once so rendering does not look up names per draw
+    rgb_from: Tuple[int, int, int]
+    rgb_to: Tuple[int, int, int]
+    size_from: int
+    size_to: int
+    description: str
+    transformation_type: str = "color_then_scale"
+
+
+def _build_frame_params(color_from: Tuple[int, int, int], color_to: Tuple[int, int, int], scale_from: float, scale_to: float, base_size: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolate the morph animation's per-frame colors and pixel sizes.
+    
+    Returns a (n, 3) uint8 color table and a length-n integer size table.
+    Progress runs linearly from 0 to 1 inclusive (a single frame is fully
+    transformed).
+    """
+    progress = np.arange(n) / (n - 1) if n > 1 else np.ones(1)
+    rgb_from = np.array(color_from)
+    colors = (rgb_from + (np.array(color_to) - rgb_from) * progress[:, None]).astype(np.uint8)
+    sizes = (base_size * (scale_from + (scale_to - scale_from) * progress)).astype(np.int64)
+    return colors, sizes
+
+
+# Generator shared with forked worker processes (see generate_task_pairs_parallel)
+_WORKER_GENERATOR: Optional["TaskGenerator"] = None
+
+
+def _build_task_pair_in_worker(spec: Tuple[str, TwoStepTaskData, str]) -> TaskPair:
+    """Render one pre-drawn task inside a worker process."""
+    task_id, task_data, prompt = spec
+    return _WORKER_GENERATOR._build_task_pair(task_id, task_data, prompt)
+
+
 class TaskGenerator(BaseGenerator):
     """
     Shape two-step sequential task generator.
@@ -29,9 +87,15 @@ class TaskGenerator(BaseGenerator):
     where shapes undergo two sequential transformations: color change then scale change.
     """
     
+    OUTLINE_COLOR = (0, 0, 0)  # Black outline
+    OUTLINE_WIDTH = 2
+    STAMP_MARKER_COLOR = (255, 0, 255)  # Stands in for the shape color when building stamps
+    
     def __init__(self, config: TaskConfig):
         super().__init__(config)
         self.renderer = ImageRenderer(image_size=config.image_size)
+        # Every render starts from a copy of the same blank canvas
+        self._blank_template = self.renderer.create_blank_image()
         
         # Initialize video generator if enabled
         self.video_generator = None
@@ -74,47 +138,245 @@ class TaskGenerator(BaseGenerator):
             "huge": 1.9
         }
         
+        # Shape name -> draw method, resolved once instead of an if/elif chain per draw
+        self._shape_dispatch = {
+            "square": self._draw_square,
+            "circle": self._draw_circle,
+            "triangle": self._draw_triangle,
+            "diamond": self._draw_diamond,
+            "pentagon": self._draw_pentagon,
+            "hexagon": self._draw_hexagon,
+            "rectangle": self._draw_rectangle,
+            "oval": self._draw_oval,
+            "star": self._draw_star,
+            "heart": self._draw_heart,
+            "cross": self._draw_cross,
+            "arrow": self._draw_arrow_shape,
+            "trapezoid": self._draw_trapezoid,
+            "rhombus": self._draw_rhombus,
+            "octagon": self._draw_octagon,
+            "crescent": self._draw_crescent,
+            "plus": self._draw_plus,
+            "minus": self._draw_minus,
+            "L_shape": self._draw_l_shape,
+            "T_shape": self._draw_t_shape,
+        }
+        
+        # Rasterized (shape, size) stamps - color-independent masks pasted instead of redrawn
+        self._sprite_cache: Dict[Tuple[str, int], ShapeStamp] = {}
+        
+        # Proportional polygon vertices, scaled and translated per draw
+        self._poly_templates = self._build_polygon_templates()
+        
+        # Layout arrows are all the same - store their geometry as offsets from the center
+        arrow_length = 40  # Shorter arrows for sequential layout
+        self._arrow_shaft_offsets = (-(arrow_length // 2), arrow_length // 2 - 8)
+        self._arrow_head_offsets = [
+            (arrow_length // 2, 0),
+            (arrow_length // 2 - 10, -6),
+            (arrow_length // 2 - 10, 6)
+        ]
+        
+        # The question mark glyph never changes - rasterize it once into a mask
+        try:
+            qmark_font = ImageFont.truetype("arial.ttf", config.question_mark_size)
+        except OSError:
+            qmark_font = ImageFont.load_default()
+        bbox = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox((0, 0), "?", font=qmark_font)
+        self._qmark_w = bbox[2] - bbox[0]
+        self._qmark_h = bbox[3] - bbox[1]
+        self._qmark_offset = (bbox[0], bbox[1])
+        self._qmark_mask = Image.new("L", (self._qmark_w, self._qmark_h), 0)
+        ImageDraw.Draw(self._qmark_mask).text((-bbox[0], -bbox[1]), "?", font=qmark_font, fill=255)
+        
         # Generate all valid transformation combinations dynamically
         self.valid_transformations = self._generate_all_valid_transformations()
         
-        # Track generated combinations to prevent duplicates
-        self.generated_combinations = set()
+        # Unique combinations are (shape pair, transformation) - drawn without replacement
+        self._shape_pairs = list(itertools.permutations(self.base_shapes, 2))
+        self._num_combinations = len(self._shape_pairs) * len(self.valid_transformations)
+        self._reset_combination_pool()
+        
+        # Layout positions depend only on image size and margin - compute once
+        self._positions_top, self._positions_bottom = self._compute_layout_positions()
+    
+    def _compute_layout_positions(self) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, Tuple[int, int]]]:
+        """Compute the A→B→C :: D→?→? layout positions (question marks sit at E and F)."""
+        width, height = self.config.image_size
+        margin = self.config.margin
+        
+        # Use wider spacing for better visual separation
+        total_content_width = width - 2 * margin
+        step_width = total_content_width // 3
+        shape_spacing = step_width * 0.8  # Leave more space between shapes
+        arrow_width = step_width * 0.2
+        
+        # Round (not truncate) so pixel positions stay nearest the fractional layout
+        column_x = [
+            round(margin + shape_spacing//2),                                    # A / D
+            round(margin + shape_spacing + arrow_width//2),                      # arrow1 / arrow3
+            round(margin + shape_spacing + arrow_width + shape_spacing//2),      # B / E
+            round(margin + 2*shape_spacing + arrow_width + arrow_width//2),      # arrow2 / arrow4
+            round(margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2),  # C / F
+        ]
+        
+        # Example row (top) - centered vertically in upper half
+        top_keys = ["A", "arrow1", "B", "arrow2", "C"]
+        positions_top = {key: (x, height//3) for key, x in zip(top_keys, column_x)}
+        
+        # Question row (bottom) - centered vertically in lower half
+        bottom_keys = ["D", "arrow3", "E", "arrow4", "F"]
+        positions_bottom = {key: (x, 2*height//3) for key, x in zip(bottom_keys, column_x)}
+        
+        return positions_top, positions_bottom
+    
+    def _build_polygon_templates(self) -> Dict[str, List[Tuple[float, float, float]]]:
+        """
+        Precompute (radius factor, dx, dy) vertex templates for the polygons
+        whose vertices are fixed proportions of half the shape size.
+        """
+        templates = {
+            "triangle": [
+                (1.0, 0.0, -1.0),   # top
+                (1.0, -1.0, 1.0),   # bottom left
+                (1.0, 1.0, 1.0),    # bottom right
+            ],
+            "diamond": [
+                (1.0, 0.0, -1.0),   # top
+                (1.0, 1.0, 0.0),    # right
+                (1.0, 0.0, 1.0),    # bottom
+                (1.0, -1.0, 0.0),   # left
+            ],
+            # Start from top
+            "pentagon": [(1.0, math.cos(angle), math.sin(angle))
+                         for angle in (i * 2 * math.pi / 5 - math.pi/2 for i in range(5))],
+            "hexagon": [(1.0, math.cos(angle), math.sin(angle))
+                        for angle in (i * 2 * math.pi / 6 for i in range(6))],
+            "octagon": [(1.0, math.cos(angle), math.sin(angle))
+                        for angle in (i * 2 * math.pi / 8 for i in range(8))],
+            # Heart approximated with a polygon
+            "heart": [
+                (1.0, 0.0, 1.0),     # bottom point
+                (1.0, -0.7, 0.0),    # left curve
+                (1.0, -0.3, -0.5),   # left top
+                (1.0, 0.0, -0.2),    # center top
+                (1.0, 0.3, -0.5),    # right top
+                (1.0, 0.7, 0.0),     # right curve
+            ],
+            # Diamond with different proportions
+            "rhombus": [
+                (1.0, 0.0, -1.0),   # top
+                (1.0, 0.7, 0.0),    # right
+                (1.0, 0.0, 1.0),    # bottom
+                (1.0, -0.7, 0.0),   # left
+            ],
+        }
+        
+        # 5-pointed star: alternating outer and inner points
+        star = []
+        for i in range(10):
+            angle = i * math.pi / 5 - math.pi/2
+            radius_factor = 1.0 if i % 2 == 0 else 0.4
+            star.append((radius_factor, math.cos(angle), math.sin(angle)))
+        templates["star"] = star
+        
+        return templates
+    
+    def _template_points(self, shape: str, x: int, y: int, half_size: int) -> List[Tuple[float, float]]:
+        """Scale and translate a precomputed vertex template."""
+        points = []
+        for radius_factor, dx, dy in self._poly_templates[shape]:
+            radius = half_size * radius_factor
+            points.append((x + radius * dx, y + radius * dy))
+        return points
     
     def _generate_all_valid_transformations(self) -> List[Tuple[str, str, str, str]]:
         """Generate all valid transformation combinations dynamically."""
-        transformations = []
         color_names = list(self.colors.keys())
         scale_names = list(self.scale_factors.keys())
         
-        # Generate all combinations where colors and scales are different
-        for color_from in color_names:
-            for color_to in color_names:
-                if color_from != color_to:  # Colors must be different
-                    for scale_from in scale_names:
-                        for scale_to in scale_names:
-                            if scale_from != scale_to:  # Scales must be different
-                                transformations.append((color_from, color_to, scale_from, scale_to))
-        
-        return transformations
+        # Colors and scales must both change - permutations skip the equal pairs
+        return [
+            (color_from, color_to, scale_from, scale_to)
+            for color_from, color_to in itertools.permutations(color_names, 2)
+            for scale_from, scale_to in itertools.permutations(scale_names, 2)
+        ]
     
     def generate_task_pair(self, task_id: str) -> TaskPair:
         """Generate one shape two-step sequential task pair."""
+        task_data, prompt = self._draw_task_spec()
+        return self._build_task_pair(task_id, task_data, prompt)
+    
+    def generate_task_pairs(self, task_ids: List[str]) -> List[TaskPair]:
+        """
+        Generate a batch of task pairs.
+        
+        All random choices for the batch are drawn up front, in the same order
+        as repeated generate_task_pair calls, so a seeded run produces the same
+        tasks either way. Rendering then runs without touching the RNG.
+        """
+        specs = [self._draw_task_spec() for _ in task_ids]
+        
+        pairs = []
+        for task_id, (task_data, prompt) in zip(task_ids, specs):
+            pairs.append(self._build_task_pair(task_id, task_data, prompt))
+            print(f"  Generated: {task_id}")
+        return pairs
+    
+    def generate_task_pairs_parallel(self, task_ids: List[str], num_workers: Optional[int] = None) -> List[TaskPair]:
+        """
+        Generate a batch of task pairs, rendering them in worker processes.
         
-        # Generate task data
-        task_data = self._generate_task_data()
+        Random choices are drawn here first (as in generate_task_pairs), so the
+        result does not depend on the number of workers. Workers are forked and
+        inherit this generator, including its warmed stamp cache, copy-on-write.
+        Falls back to serial generation where fork is unavailable.
+        """
+        global _WORKER_GENERATOR
+        
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return self.generate_task_pairs(task_ids)
+        
+        specs = [(task_id, *self._draw_task_spec()) for task_id in task_ids]
+        self._warm_stamp_cache()
         
+        num_workers = num_workers or os.cpu_count() or 1
+        chunksize = max(1, len(specs) // (num_workers * 4))
+        
+        _WORKER_GENERATOR = self
+        try:
+            pairs = []
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("fork")) as executor:
+                for pair in executor.map(_build_task_pair_in_worker, specs, chunksize=chunksize):
+                    pairs.append(pair)
+                    print(f"  Generated: {pair.task_id}")
+        finally:
+            _WORKER_GENERATOR = None
+        return pairs
+    
+    def generate_dataset(self) -> List[TaskPair]:
+        """Generate complete dataset as a single batch."""
+        task_ids = [f"{self.config.domain}_{i:04d}" for i in range(self.config.num_samples)]
+        if self.config.num_workers == 1:
+            return self.generate_task_pairs(task_ids)
+        return self.generate_task_pairs_parallel(task_ids, self.config.num_workers)
+    
+    def _draw_task_spec(self) -> Tuple[TwoStepTaskData, str]:
+        """Draw the random parts of one task: its transformation data and prompt."""
+        task_data = self._generate_task_data()
+        prompt = get_prompt(task_data.transformation_type)
+        return task_data, prompt
+    
+    def _build_task_pair(self, task_id: str, task_data: TwoStepTaskData, prompt: str) -> TaskPair:
+        """Render images and video for already-drawn task data."""
         # Render images
-        first_image = self._render_initial_state(task_data)
-        final_image = self._render_final_state(task_data)
+        first_image, final_image = self._render_task_images(task_data)
         
         # Generate video (optional)
         video_path = None
         if self.config.generate_videos and self.video_generator:
             video_path = self._generate_video(first_image, final_image, task_id, task_data)
         
-        # Select prompt
-        prompt = get_prompt(task_data.get("transformation_type", "default"))
-        
         return TaskPair(
             task_id=task_id,
             domain=self.config.domain,
@@ -128,575 +390,489 @@ class TaskGenerator(BaseGenerator):
     #  TASK DATA GENERATION
     # ══════════════════════════════════════════════════════════════════════════
     
-    def _generate_task_data(self) -> Dict[str, Any]:
+    def _generate_task_data(self) -> TwoStepTaskData:
         """Generate two-step sequential transformation task data with duplicate prevention."""
-        
-        # Calculate total possible unique combinations
-        num_shapes = len(self.base_shapes)
-        num_transformations = len(self.valid_transformations)
-        max_unique_combinations = num_shapes * (num_shapes - 1) * num_transformations
-        
-        # If we haven't exhausted all combinations, ensure uniqueness
-        if len(self.generated_combinations) < max_unique_combinations:
-            max_attempts = 1000  # Increase attempts for better coverage
-            for attempt in range(max_attempts):
-                # Select two different shapes for the analogy
-                shape_example, shape_question = random.sample(self.base_shapes, 2)
-                # Select a valid transformation sequence (color and scale changes)
-                color_from, color_to, scale_from, scale_to = random.choice(self.valid_transformations)
-                
-                # Create a unique identifier for this combination
-                combination_key = (shape_example, shape_question, color_from, color_to, scale_from, scale_to)
-                
-                # Check if this combination has been used before
-                if combination_key not in self.generated_combinations:
-                    self.generated_combinations.add(combination_key)
-                    return self._generate_two_step_task(shape_example, shape_question, color_from, color_to, scale_from, scale_to)
-            
-            # If we still can't find a unique combination after many attempts,
-            # generate all remaining combinations systematically
-            return self._generate_systematic_unique_combination()
-        
-        # If we've exhausted unique combinations, allow duplicates but warn
-        if len(self.generated_combinations) == max_unique_combinations:
-            print(f"⚠️  Warning: Generated all {max_unique_combinations} unique combinations. Allowing duplicates for remaining tasks.")
-        
-        shape_example, shape_question = random.sample(self.base_shapes, 2)
-        color_from, color_to, scale_from, scale_to = random.choice(self.valid_transformations)
+        shape_example, shape_question, color_from, color_to, scale_from, scale_to = self._draw_combination()
         return self._generate_two_step_task(shape_example, shape_question, color_from, color_to, scale_from, scale_to)
     
-    def _generate_systematic_unique_combination(self) -> Dict[str, Any]:
-        """Generate a unique combination systematically when random selection fails."""
-        # Generate all possible combinations and find one not yet used
-        for shape_example in self.base_shapes:
-            for shape_question in self.base_shapes:
-                if shape_example == shape_question:
-                    continue
-                for color_from, color_to, scale_from, scale_to in self.valid_transformations:
-                    combination_key = (shape_example, shape_question, color_from, color_to, scale_from, scale_to)
-                    if combination_key not in self.generated_combinations:
-                        self.generated_combinations.add(combination_key)
-                        return self._generate_two_step_task(shape_example, shape_question, color_from, color_to, scale_from, scale_to)
-        
-        # This should never happen if our math is correct
-        raise RuntimeError("Failed to generate unique combination - this should not happen!")
-    
-    def _generate_two_step_task(self, shape_example: str, shape_question: str, color_from: str, color_to: str, scale_from: str, scale_to: str) -> Dict[str, Any]:
+    def _reset_combination_pool(self):
+        """Make every unique combination available again."""
+        self._remaining_combinations = self._num_combinations
+        self._combination_swaps: Dict[int, int] = {}
+    
+    def _draw_combination(self) -> Tuple[str, str, str, str, str, str]:
+        """
+        Draw an unused combination uniformly at random in O(1).
+        
+        Runs a lazy Fisher-Yates shuffle over combination indices: only the
+        swapped slots are stored, so the (millions of) combinations are never
+        materialized and every draw costs the same regardless of saturation.
+        """
+        if self._remaining_combinations == 0:
+            print(f"⚠️  Warning: Generated all {self._num_combinations} unique combinations. Allowing duplicates for remaining tasks.")
+            self._reset_combination_pool()
+        
+        swaps = self._combination_swaps
+        last = self._remaining_combinations - 1
+        pick = random.randrange(self._remaining_combinations)
+        index = swaps.get(pick, pick)
+        # Move the last live slot into the drawn one
+        swaps[pick] = swaps.pop(last, last)
+        self._remaining_combinations = last
+        
+        pair_index, transformation_index = divmod(index, len(self.valid_transformations))
+        return self._shape_pairs[pair_index] + self.valid_transformations[transformation_index]
+    
+    def _generate_two_step_task(self, shape_example: str, shape_question: str, color_from: str, color_to: str, scale_from: str, scale_to: str) -> TwoStepTaskData:
         """Generate a two-step sequential transformation task."""
-        
-        return {
-            "transformation_type": "color_then_scale",
-            # Example sequence: A → B → C
-            "shape_a": shape_example,  # Original
-            "shape_b": shape_example,  # After step 1 (color change)
-            "shape_c": shape_example,  # After step 2 (scale change)
-            # Question sequence: D → ? → ?
-            "shape_d": shape_question,  # Original
-            "shape_e": shape_question,  # After step 1 (color change) - first ?
-            "shape_f": shape_question,  # After step 2 (scale change) - second ?
-            "color_from": color_from,
-            "color_to": color_to,
-            "scale_from": scale_from,
-            "scale_to": scale_to,
-            "description": f"Step 1: {color_from} → {color_to}, Step 2: {scale_from} → {scale_to}"
-        }
+        return TwoStepTaskData(
+            shape_a=shape_example,
+            shape_b=shape_example,
+            shape_c=shape_example,
+            shape_d=shape_question,
+            shape_e=shape_question,
+            shape_f=shape_question,
+            color_from=color_from,
+            color_to=color_to,
+            scale_from=scale_from,
+            scale_to=scale_to,
+            rgb_from=self.colors[color_from],
+            rgb_to=self.colors[color_to],
+            size_from=int(self.config.shape_size * self.scale_factors[scale_from]),
+            size_to=int(self.config.shape_size * self.scale_factors[scale_to]),
+            description=f"Step 1: {color_from} → {color_to}, Step 2: {scale_from} → {scale_to}"
+        )
     
     # ══════════════════════════════════════════════════════════════════════════
     #  IMAGE RENDERING
     # ══════════════════════════════════════════════════════════════════════════
     
-    def _render_initial_state(self, task_data: Dict[str, Any]) -> Image.Image:
-        """Render the initial state with A→B→C :: D→?→? layout."""
-        img = self.renderer.create_blank_image()
+    def _render_task_images(self, task_data: TwoStepTaskData) -> Tuple[Image.Image, Image.Image]:
+        """Render the initial and final states, drawing the elements they share only once."""
+        common = self._render_common_elements(task_data)
+        first_image = self._render_initial_state(task_data, common.copy())
+        final_image = self._render_final_state(task_data, common)
+        return first_image, final_image
+    
+    def _render_common_elements(self, task_data: TwoStepTaskData) -> Image.Image:
+        """
+        Render the elements shared by the initial and final states.
+        
+        This is the A→B→C example row plus D - everything drawn before the two
+        states diverge. arrow3/arrow4 stay out because large answer shapes
+        overlap them and must keep their original drawing order.
+        """
+        img = self._blank_template.copy()
         draw = ImageDraw.Draw(img)
         
-        width, height = self.config.image_size
-        margin = self.config.margin
-        base_shape_size = self.config.shape_size
-        
         # Layout positions for sequential format with better spacing
         # A  →  B  →  C
         # D  →  ?  →  ?
-        
-        # Use wider spacing for better visual separation
-        total_content_width = width - 2 * margin
-        step_width = total_content_width // 3
-        shape_spacing = step_width * 0.8  # Leave more space between shapes
-        arrow_width = step_width * 0.2
-        
-        positions = {
-            # Example row (top) - centered vertically in upper half
-            "A": (margin + shape_spacing//2, height//3),
-            "arrow1": (margin + shape_spacing + arrow_width//2, height//3),
-            "B": (margin + shape_spacing + arrow_width + shape_spacing//2, height//3),
-            "arrow2": (margin + 2*shape_spacing + arrow_width + arrow_width//2, height//3),
-            "C": (margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2, height//3),
-            
-            # Question row (bottom) - centered vertically in lower half
-            "D": (margin + shape_spacing//2, 2*height//3),
-            "arrow3": (margin + shape_spacing + arrow_width//2, 2*height//3),
-            "question1": (margin + shape_spacing + arrow_width + shape_spacing//2, 2*height//3),
-            "arrow4": (margin + 2*shape_spacing + arrow_width + arrow_width//2, 2*height//3),
-            "question2": (margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2, 2*height//3)
-        }
+        top = self._positions_top
+        bottom = self._positions_bottom
         
         # Draw example sequence: A → B → C
-        self._draw_shape_at_position(draw, task_data["shape_a"], positions["A"], base_shape_size, 
-                                   task_data["color_from"], task_data["scale_from"])  # A: Original
-        self._draw_arrow(draw, positions["arrow1"])
-        self._draw_shape_at_position(draw, task_data["shape_b"], positions["B"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_from"])  # B: Color changed
-        self._draw_arrow(draw, positions["arrow2"])
-        self._draw_shape_at_position(draw, task_data["shape_c"], positions["C"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_to"])  # C: Color + Scale changed
+        self._draw_shape_at_position(img, task_data.shape_a, top["A"], task_data.size_from, task_data.rgb_from)  # A: Original
+        self._draw_arrow(draw, top["arrow1"])
+        self._draw_shape_at_position(img, task_data.shape_b, top["B"], task_data.size_from, task_data.rgb_to)  # B: Color changed
+        self._draw_arrow(draw, top["arrow2"])
+        self._draw_shape_at_position(img, task_data.shape_c, top["C"], task_data.size_to, task_data.rgb_to)  # C: Color + Scale changed
         
-        # Draw question sequence: D → ? → ?
-        self._draw_shape_at_position(draw, task_data["shape_d"], positions["D"], base_shape_size, 
-                                   task_data["color_from"], task_data["scale_from"])  # D: Original
-        self._draw_arrow(draw, positions["arrow3"])
-        self._draw_question_mark(draw, positions["question1"])  # First ?
-        self._draw_arrow(draw, positions["arrow4"])
-        self._draw_question_mark(draw, positions["question2"])  # Second ?
+        # Start of the question sequence
+        self._draw_shape_at_position(img, task_data.shape_d, bottom["D"], task_data.size_from, task_data.rgb_from)  # D: Original
         
         return img
     
-    def _render_final_state(self, task_data: Dict[str, Any]) -> Image.Image:
-        """Render the final state with both answers revealed."""
-        img = self.renderer.create_blank_image()
+    def _render_initial_state(self, task_data: TwoStepTaskData, img: Image.Image) -> Image.Image:
+        """Complete the common elements into the initial A→B→C :: D→?→? state."""
         draw = ImageDraw.Draw(img)
+        bottom = self._positions_bottom
         
-        width, height = self.config.image_size
-        margin = self.config.margin
-        base_shape_size = self.config.shape_size
-        
-        # Same improved layout as initial state
-        total_content_width = width - 2 * margin
-        step_width = total_content_width // 3
-        shape_spacing = step_width * 0.8
-        arrow_width = step_width * 0.2
-        
-        positions = {
-            # Example row (top)
-            "A": (margin + shape_spacing//2, height//3),
-            "arrow1": (margin + shape_spacing + arrow_width//2, height//3),
-            "B": (margin + shape_spacing + arrow_width + shape_spacing//2, height//3),
-            "arrow2": (margin + 2*shape_spacing + arrow_width + arrow_width//2, height//3),
-            "C": (margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2, height//3),
-            
-            # Question row (bottom)
-            "D": (margin + shape_spacing//2, 2*height//3),
-            "arrow3": (margin + shape_spacing + arrow_width//2, 2*height//3),
-            "E": (margin + shape_spacing + arrow_width + shape_spacing//2, 2*height//3),
-            "arrow4": (margin + 2*shape_spacing + arrow_width + arrow_width//2, 2*height//3),
-            "F": (margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2, 2*height//3)
-        }
+        # Draw question sequence: D → ? → ?
+        self._draw_arrow(draw, bottom["arrow3"])
+        self._draw_question_mark(img, bottom["E"])  # First ?
+        self._draw_arrow(draw, bottom["arrow4"])
+        self._draw_question_mark(img, bottom["F"])  # Second ?
         
-        # Draw example sequence: A → B → C (same as initial)
-        self._draw_shape_at_position(draw, task_data["shape_a"], positions["A"], base_shape_size, 
-                                   task_data["color_from"], task_data["scale_from"])  # A: Original
-        self._draw_arrow(draw, positions["arrow1"])
-        self._draw_shape_at_position(draw, task_data["shape_b"], positions["B"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_from"])  # B: Color changed
-        self._draw_arrow(draw, positions["arrow2"])
-        self._draw_shape_at_position(draw, task_data["shape_c"], positions["C"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_to"])  # C: Color + Scale changed
+        return img
+    
+    def _render_final_state(self, task_data: TwoStepTaskData, img: Image.Image) -> Image.Image:
+        """Complete the common elements into the final state with both answers revealed."""
+        draw = ImageDraw.Draw(img)
+        bottom = self._positions_bottom
         
         # Draw answer sequence: D → E → F (answers revealed)
-        self._draw_shape_at_position(draw, task_data["shape_d"], positions["D"], base_shape_size, 
-                                   task_data["color_from"], task_data["scale_from"])  # D: Original
-        self._draw_arrow(draw, positions["arrow3"])
-        self._draw_shape_at_position(draw, task_data["shape_e"], positions["E"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_from"])  # E: Color changed (first answer)
-        self._draw_arrow(draw, positions["arrow4"])
-        self._draw_shape_at_position(draw, task_data["shape_f"], positions["F"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_to"])  # F: Color + Scale changed (second answer)
+        self._draw_arrow(draw, bottom["arrow3"])
+        self._draw_shape_at_position(img, task_data.shape_e, bottom["E"], task_data.size_from, task_data.rgb_to)  # E: Color changed (first answer)
+        self._draw_arrow(draw, bottom["arrow4"])
+        self._draw_shape_at_position(img, task_data.shape_f, bottom["F"], task_data.size_to, task_data.rgb_to)  # F: Color + Scale changed (second answer)
         
         return img
     
-    def _draw_shape_at_position(self, draw: ImageDraw.Draw, shape: str, position: Tuple[int, int], base_size: int, color_name: str, scale_name: str):
-        """Draw a shape at the specified position with the given color and scale."""
+    def _draw_shape_at_position(self, img: Image.Image, shape: str, position: Tuple[int, int], size: int, color: Tuple[int, int, int]):
+        """Draw a shape at the specified position with the given pixel size and color."""
         x, y = position
-        
-        color = self.colors[color_name]
-        scale_factor = self.scale_factors[scale_name]
-        actual_size = int(base_size * scale_factor)
-        
-        self._draw_base_shape(draw, shape, x, y, actual_size, color)
+        self._stamp_shape(img, shape, x, y, size, color)
     
-    def _draw_base_shape(self, draw: ImageDraw.Draw, shape: str, x: int, y: int, size: int, color: Tuple[int, int, int]):
-        """Draw a basic geometric shape with specified color and size."""
-        half_size = size // 2
-        outline_color = (0, 0, 0)  # Black outline
-        outline_width = 2
-        
-        if shape == "square":
-            draw.rectangle([x-half_size, y-half_size, x+half_size, y+half_size], 
-                         fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "circle":
-            draw.ellipse([x-half_size, y-half_size, x+half_size, y+half_size], 
-                        fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "triangle":
-            points = [
-                (x, y-half_size),  # top
-                (x-half_size, y+half_size),  # bottom left
-                (x+half_size, y+half_size)   # bottom right
-            ]
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "diamond":
-            points = [
-                (x, y-half_size),  # top
-                (x+half_size, y),  # right
-                (x, y+half_size),  # bottom
-                (x-half_size, y)   # left
-            ]
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "pentagon":
-            points = []
-            for i in range(5):
-                angle = i * 2 * math.pi / 5 - math.pi/2  # Start from top
-                px = x + half_size * math.cos(angle)
-                py = y + half_size * math.sin(angle)
-                points.append((px, py))
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "hexagon":
-            points = []
-            for i in range(6):
-                angle = i * 2 * math.pi / 6
-                px = x + half_size * math.cos(angle)
-                py = y + half_size * math.sin(angle)
-                points.append((px, py))
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "rectangle":
-            # Rectangle (wider than tall)
-            width_factor = 1.4
-            rect_width = int(half_size * width_factor)
-            rect_height = int(half_size * 0.7)
-            draw.rectangle([x-rect_width, y-rect_height, x+rect_width, y+rect_height], 
-                         fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "oval":
-            # Oval (wider than tall)
-            width_factor = 1.4
-            oval_width = int(half_size * width_factor)
-            oval_height = int(half_size * 0.7)
-            draw.ellipse([x-oval_width, y-oval_height, x+oval_width, y+oval_height], 
-                        fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "star":
-            # 5-pointed star
-            points = []
-            outer_radius = half_size
-            inner_radius = half_size * 0.4
+    def _stamp_shape(self, img: Image.Image, shape: str, x: int, y: int, size: int, color: Tuple[int, int, int]):
+        """Write a shape's pixels into the image by pasting solid colors through its cached masks."""
+        layers, (offset_x, offset_y) = self._get_shape_stamp(shape, size)
+        box = (x + offset_x, y + offset_y)
+        for ink, mask in layers:
+            img.paste(color if ink is None else ink, box, Image.fromarray(mask))
+    
+    def _stamp_shape_array(self, frame: np.ndarray, shape: str, x: int, y: int, size: int, color: Tuple[int, int, int], channel_order: str = "rgb"):
+        """
+        Write a shape's pixels into an (H, W, 3) frame buffer through its cached masks.
+        
+        The color is given as RGB; with channel_order "bgr" it and the stamp's
+        own inks are written channel-swapped to match a BGR buffer.
+        """
+        layers, (offset_x, offset_y) = self._get_shape_stamp(shape, size)
+        left, top = x + offset_x, y + offset_y
+        stamp_h, stamp_w = layers[0][1].shape
+        
+        # Clip to the frame like Image.paste does
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + stamp_w, frame_w), min(top + stamp_h, frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        region = frame[y0:y1, x0:x1]
+        for ink, mask in layers:
+            ink = color if ink is None else ink
+            region[mask[y0 - top:y1 - top, x0 - left:x1 - left]] = ink[::-1] if channel_order == "bgr" else ink
+    
+    def _warm_stamp_cache(self):
+        """Rasterize the stamps for every shape at every static layout scale."""
+        for shape in self.base_shapes:
+            for scale_factor in self.scale_factors.values():
+                self._get_shape_stamp(shape, int(self.config.shape_size * scale_factor))
+    
+    def _get_shape_stamp(self, shape: str, size: int) -> ShapeStamp:
+        """
+        Return the cached stamp for a shape at a given pixel size.
+        
+        Stamps are color-independent, so one rasterization serves every color.
+        On a cache miss the shape is drawn once with a marker fill color and
+        split into one mask per distinct color (fill, outline, crescent
+        cut-out), cropped to the drawn pixels.
+        """
+        key = (shape, size)
+        cached = self._sprite_cache.get(key)
+        if cached is None:
+            # Widest shapes reach 0.7 * size from the center, plus the outline
+            center = size + self.OUTLINE_WIDTH
+            canvas = Image.new("RGBA", (2 * center + 1, 2 * center + 1), (0, 0, 0, 0))
+            self._draw_base_shape(ImageDraw.Draw(canvas), shape, center, center, size, self.STAMP_MARKER_COLOR)
             
-            for i in range(10):  # 5 outer + 5 inner points
-                if i % 2 == 0:  # Outer points
-                    angle = i * math.pi / 5 - math.pi/2
-                    px = x + outer_radius * math.cos(angle)
-                    py = y + outer_radius * math.sin(angle)
-                else:  # Inner points
-                    angle = i * math.pi / 5 - math.pi/2
-                    px = x + inner_radius * math.cos(angle)
-                    py = y + inner_radius * math.sin(angle)
-                points.append((px, py))
+            left, top, right, bottom = canvas.getbbox()
+            pixels = np.asarray(canvas.crop((left, top, right, bottom)))
+            opaque = pixels[..., 3] > 0
+            layers = []
+            for rgb in np.unique(pixels[opaque][:, :3], axis=0):
+                mask = opaque & (pixels[..., :3] == rgb).all(axis=-1)
+                ink = tuple(int(c) for c in rgb)
+                layers.append((None if ink == self.STAMP_MARKER_COLOR else ink, mask))
             
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "heart":
-            # Heart shape using curves (approximate with polygon)
-            points = [
-                (x, y + half_size),                    # bottom point
-                (x - half_size*0.7, y),              # left curve
-                (x - half_size*0.3, y - half_size*0.5), # left top
-                (x, y - half_size*0.2),              # center top
-                (x + half_size*0.3, y - half_size*0.5),  # right top
-                (x + half_size*0.7, y),               # right curve
-            ]
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "cross":
-            # Cross shape
-            thickness = half_size // 4
-            # Vertical bar
-            draw.rectangle([x-thickness, y-half_size, x+thickness, y+half_size],
-                         fill=color, outline=outline_color, width=outline_width)
-            # Horizontal bar
-            draw.rectangle([x-half_size, y-thickness, x+half_size, y+thickness],
-                         fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "arrow":
-            # Arrow pointing right
-            points = [
-                (x-half_size, y-half_size//2),  # left top
-                (x, y-half_size//2),            # middle top
-                (x, y-half_size),               # tip top
-                (x+half_size, y),               # tip point
-                (x, y+half_size),               # tip bottom
-                (x, y+half_size//2),            # middle bottom
-                (x-half_size, y+half_size//2)   # left bottom
-            ]
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "trapezoid":
-            # Trapezoid (wider at bottom)
-            top_width = half_size // 2
-            points = [
-                (x-top_width, y-half_size),     # top left
-                (x+top_width, y-half_size),     # top right
-                (x+half_size, y+half_size),     # bottom right
-                (x-half_size, y+half_size)      # bottom left
-            ]
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "rhombus":
-            # Rhombus (diamond with different proportions)
-            points = [
-                (x, y-half_size),               # top
-                (x+half_size*0.7, y),           # right
-                (x, y+half_size),               # bottom
-                (x-half_size*0.7, y)            # left
-            ]
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "octagon":
-            # Regular octagon
-            points = []
-            for i in range(8):
-                angle = i * 2 * math.pi / 8
-                px = x + half_size * math.cos(angle)
-                py = y + half_size * math.sin(angle)
-                points.append((px, py))
-            draw.polygon(points, fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "crescent":
-            # Crescent moon shape (two overlapping circles)
-            # Draw larger circle
-            draw.ellipse([x-half_size, y-half_size, x+half_size, y+half_size],
-                        fill=color, outline=outline_color, width=outline_width)
-            # Draw smaller circle to create crescent (using background color)
-            offset = half_size // 3
-            smaller_radius = int(half_size * 0.7)
-            draw.ellipse([x-smaller_radius+offset, y-smaller_radius, x+smaller_radius+offset, y+smaller_radius],
-                        fill=(255,255,255), outline=outline_color, width=outline_width)
-        
-        elif shape == "plus":
-            # Plus sign (thicker cross)
-            thickness = half_size // 3
-            # Vertical bar
-            draw.rectangle([x-thickness, y-half_size, x+thickness, y+half_size],
-                         fill=color, outline=outline_color, width=outline_width)
-            # Horizontal bar
-            draw.rectangle([x-half_size, y-thickness, x+half_size, y+thickness],
-                         fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "minus":
-            # Minus sign (horizontal bar)
-            thickness = half_size // 4
-            draw.rectangle([x-half_size, y-thickness, x+half_size, y+thickness],
-                         fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "L_shape":
-            # L shape
-            thickness = half_size // 3
-            # Vertical part
-            draw.rectangle([x-half_size, y-half_size, x-half_size+thickness, y+half_size],
-                         fill=color, outline=outline_color, width=outline_width)
-            # Horizontal part
-            draw.rectangle([x-half_size, y+half_size-thickness, x+half_size, y+half_size],
-                         fill=color, outline=outline_color, width=outline_width)
-        
-        elif shape == "T_shape":
-            # T shape
-            thickness = half_size // 3
-            # Horizontal top part
-            draw.rectangle([x-half_size, y-half_size, x+half_size, y-half_size+thickness],
-                         fill=color, outline=outline_color, width=outline_width)
-            # Vertical part
-            draw.rectangle([x-thickness//2, y-half_size, x+thickness//2, y+half_size],
-                         fill=color, outline=outline_color, width=outline_width)
+            cached = (layers, (left - center, top - center))
+            self._sprite_cache[key] = cached
+        return cached
+    
+    def _draw_base_shape(self, draw: ImageDraw.Draw, shape: str, x: int, y: int, size: int, color: Tuple[int, int, int]):
+        """Draw a basic geometric shape with specified color and size."""
+        # Shape methods take the half extent, derived once here for all shapes
+        self._shape_dispatch[shape](draw, x, y, size // 2, color)
+    
+    def _draw_square(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a square."""
+        draw.rectangle([x-half_size, y-half_size, x+half_size, y+half_size], 
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_circle(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a circle."""
+        draw.ellipse([x-half_size, y-half_size, x+half_size, y+half_size], 
+                    fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_triangle(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a triangle."""
+        points = self._template_points("triangle", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_diamond(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a diamond."""
+        points = self._template_points("diamond", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_pentagon(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a pentagon."""
+        points = self._template_points("pentagon", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_hexagon(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a hexagon."""
+        points = self._template_points("hexagon", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_rectangle(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a rectangle (wider than tall)."""
+        width_factor = 1.4
+        rect_width = int(half_size * width_factor)
+        rect_height = int(half_size * 0.7)
+        draw.rectangle([x-rect_width, y-rect_height, x+rect_width, y+rect_height], 
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_oval(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw an oval (wider than tall)."""
+        width_factor = 1.4
+        oval_width = int(half_size * width_factor)
+        oval_height = int(half_size * 0.7)
+        draw.ellipse([x-oval_width, y-oval_height, x+oval_width, y+oval_height], 
+                    fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_star(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a 5-pointed star."""
+        points = self._template_points("star", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_heart(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a heart shape using curves (approximate with polygon)."""
+        points = self._template_points("heart", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_cross(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a cross shape."""
+        thickness = half_size // 4
+        # Vertical bar
+        draw.rectangle([x-thickness, y-half_size, x+thickness, y+half_size],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+        # Horizontal bar
+        draw.rectangle([x-half_size, y-thickness, x+half_size, y+thickness],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_arrow_shape(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw an arrow pointing right."""
+        points = [
+            (x-half_size, y-half_size//2),  # left top
+            (x, y-half_size//2),            # middle top
+            (x, y-half_size),               # tip top
+            (x+half_size, y),               # tip point
+            (x, y+half_size),               # tip bottom
+            (x, y+half_size//2),            # middle bottom
+            (x-half_size, y+half_size//2)   # left bottom
+        ]
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_trapezoid(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a trapezoid (wider at bottom)."""
+        top_width = half_size // 2
+        points = [
+            (x-top_width, y-half_size),     # top left
+            (x+top_width, y-half_size),     # top right
+            (x+half_size, y+half_size),     # bottom right
+            (x-half_size, y+half_size)      # bottom left
+        ]
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_rhombus(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a rhombus (diamond with different proportions)."""
+        points = self._template_points("rhombus", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_octagon(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a regular octagon."""
+        points = self._template_points("octagon", x, y, half_size)
+        draw.polygon(points, fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_crescent(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a crescent moon shape (two overlapping circles)."""
+        # Draw larger circle
+        draw.ellipse([x-half_size, y-half_size, x+half_size, y+half_size],
+                    fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+        # Draw smaller circle to create crescent (using background color)
+        offset = half_size // 3
+        smaller_radius = int(half_size * 0.7)
+        draw.ellipse([x-smaller_radius+offset, y-smaller_radius, x+smaller_radius+offset, y+smaller_radius],
+                    fill=(255,255,255), outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_plus(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a plus sign (thicker cross)."""
+        thickness = half_size // 3
+        # Vertical bar
+        draw.rectangle([x-thickness, y-half_size, x+thickness, y+half_size],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+        # Horizontal bar
+        draw.rectangle([x-half_size, y-thickness, x+half_size, y+thickness],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_minus(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a minus sign (horizontal bar)."""
+        thickness = half_size // 4
+        draw.rectangle([x-half_size, y-thickness, x+half_size, y+thickness],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_l_shape(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw an L shape."""
+        thickness = half_size // 3
+        # Vertical part
+        draw.rectangle([x-half_size, y-half_size, x-half_size+thickness, y+half_size],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+        # Horizontal part
+        draw.rectangle([x-half_size, y+half_size-thickness, x+half_size, y+half_size],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+    
+    def _draw_t_shape(self, draw: ImageDraw.Draw, x: int, y: int, half_size: int, color: Tuple[int, int, int]):
+        """Draw a T shape."""
+        thickness = half_size // 3
+        # Horizontal top part
+        draw.rectangle([x-half_size, y-half_size, x+half_size, y-half_size+thickness],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
+        # Vertical part
+        draw.rectangle([x-thickness//2, y-half_size, x+thickness//2, y+half_size],
+                     fill=color, outline=self.OUTLINE_COLOR, width=self.OUTLINE_WIDTH)
     
     def _draw_arrow(self, draw: ImageDraw.Draw, position: Tuple[int, int]):
         """Draw a right-pointing arrow."""
         x, y = position
-        length = 40  # Shorter arrows for sequential layout
+        shaft_start, shaft_end = self._arrow_shaft_offsets
         
         # Arrow shaft
-        draw.line([x-length//2, y, x+length//2-8, y], fill=(0,0,0), width=2)
+        draw.line([x+shaft_start, y, x+shaft_end, y], fill=(0,0,0), width=2)
         
         # Arrow head
-        points = [
-            (x+length//2, y),
-            (x+length//2-10, y-6),
-            (x+length//2-10, y+6)
-        ]
-        draw.polygon(points, fill=(0,0,0))
+        draw.polygon([(x+dx, y+dy) for dx, dy in self._arrow_head_offsets], fill=(0,0,0))
     
-    def _draw_question_mark(self, draw: ImageDraw.Draw, position: Tuple[int, int]):
-        """Draw a question mark."""
+    def _draw_question_mark(self, img: Image.Image, position: Tuple[int, int]):
+        """Draw a question mark by pasting the prerasterized glyph mask."""
         x, y = position
-        size = self.config.question_mark_size
-        
-        try:
-            font = ImageFont.truetype("arial.ttf", size)
-        except:
-            font = ImageFont.load_default()
-        
-        # Get text bounds for centering
-        bbox = draw.textbbox((0, 0), "?", font=font)
-        w = bbox[2] - bbox[0]
-        h = bbox[3] - bbox[1]
         
-        text_x = x - w // 2
-        text_y = y - h // 2
+        text_x = x - self._qmark_w // 2
+        text_y = y - self._qmark_h // 2
         
-        draw.text((text_x, text_y), "?", font=font, fill=(100, 100, 100))
+        offset_x, offset_y = self._qmark_offset
+        img.paste((100, 100, 100), (text_x + offset_x, text_y + offset_y), self._qmark_mask)
     
     # ══════════════════════════════════════════════════════════════════════════
     #  VIDEO GENERATION
     # ══════════════════════════════════════════════════════════════════════════
     
-    def _generate_video(self, first_image: Image.Image, final_image: Image.Image, task_id: str, task_data: Dict[str, Any]) -> str:
+    def _generate_video(self, first_image: Image.Image, final_image: Image.Image, task_id: str, task_data: TwoStepTaskData) -> str:
         """Generate ground truth video showing the transformation."""
         temp_dir = Path(tempfile.gettempdir()) / f"{self.config.domain}_videos"
         temp_dir.mkdir(parents=True, exist_ok=True)
         video_path = temp_dir / f"{task_id}_ground_truth.mp4"
         
-        # Create animation frames
-        frames = self._create_transformation_frames(first_image, final_image, task_data)
+        # Create animation frames, with the morph arrays already in OpenCV's BGR order
+        frames = self._create_transformation_frames(first_image, final_image, task_data, channel_order="bgr")
         
-        result = self.video_generator.create_video_from_frames(frames, video_path)
+        result = self.video_generator.create_video_from_frames(frames, video_path, channel_order="bgr")
         return str(result) if result else None
     
-    def _create_transformation_frames(self, first_image: Image.Image, final_image: Image.Image, task_data: Dict[str, Any], hold_frames: int = 20, step_frames: int = 25) -> List[Image.Image]:
-        """Create animation frames showing the two-step sequential transformation."""
-        frames = []
-        
+    def _create_transformation_frames(self, first_image: Image.Image, final_image: Image.Image, task_data: TwoStepTaskData, hold_frames: int = 20, step_frames: int = 25, channel_order: str = "rgb") -> Iterator[np.ndarray]:
+        """
+        Yield animation frames showing the two-step sequential transformation.
+        
+        Frames are produced lazily for the video encoder. The held images are
+        converted to arrays in channel_order once and the same array is
+        repeated for every hold frame.
+        """
         # Hold initial state
+        first_frame = self._to_frame_array(first_image, channel_order)
         for _ in range(hold_frames):
-            frames.append(first_image.copy())
+            yield first_frame
         
         # Create two-step animation: first ? then second ?
-        frames.extend(self._create_sequential_morph_frames(task_data, step_frames))
+        yield from self._create_sequential_morph_frames(task_data, step_frames, channel_order)
         
         # Hold final state
+        final_frame = self._to_frame_array(final_image, channel_order)
         for _ in range(hold_frames):
-            frames.append(final_image.copy())
-        
-        return frames
+            yield final_frame
+    
+    @staticmethod
+    def _to_frame_array(img: Image.Image, channel_order: str = "rgb") -> np.ndarray:
+        """Convert an RGB image to an (H, W, 3) uint8 frame array in the given channel order."""
+        frame = np.asarray(img)
+        if channel_order == "bgr":
+            frame = np.ascontiguousarray(frame[..., ::-1])
+        return frame
     
-    def _create_sequential_morph_frames(self, task_data: Dict[str, Any], step_frames: int) -> List[Image.Image]:
-        """Create frames showing the sequential two-step transformation."""
-        frames = []
+    def _create_sequential_morph_frames(self, task_data: TwoStepTaskData, step_frames: int, channel_order: str = "rgb") -> Iterator[np.ndarray]:
+        """
+        Yield frames showing the sequential two-step transformation.
         
-        width, height = self.config.image_size
-        margin = self.config.margin
+        Frames are (H, W, 3) uint8 arrays in RGB order, or BGR when
+        channel_order is "bgr" so an OpenCV encoder needs no per-frame swap.
+        """
         base_shape_size = self.config.shape_size
         
-        step_width = (width - 2 * margin) // 3
-        arrow_offset = step_width // 4
-        
-        # Calculate improved positions for the question marks that will be revealed
-        total_content_width = width - 2 * margin
-        step_width = total_content_width // 3
-        shape_spacing = step_width * 0.8
-        arrow_width = step_width * 0.2
-        
-        question1_pos = (margin + shape_spacing + arrow_width + shape_spacing//2, 2*height//3)
-        question2_pos = (margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2, 2*height//3)
-        
-        shape_d = task_data["shape_d"]
-        color_from = self.colors[task_data["color_from"]]
-        color_to = self.colors[task_data["color_to"]]
-        scale_from = self.scale_factors[task_data["scale_from"]]
-        scale_to = self.scale_factors[task_data["scale_to"]]
-        
-        # Step 1: Reveal first ? (color change)
-        for i in range(step_frames):
-            img = self._render_static_elements(task_data, base_shape_size, step_width, arrow_offset, margin, width, height)
-            draw = ImageDraw.Draw(img)
-            
-            # Interpolate color for first question mark
-            progress = i / (step_frames - 1) if step_frames > 1 else 1.0
-            current_color = (
-                int(color_from[0] + (color_to[0] - color_from[0]) * progress),
-                int(color_from[1] + (color_to[1] - color_from[1]) * progress),
-                int(color_from[2] + (color_to[2] - color_from[2]) * progress)
-            )
-            current_size = int(base_shape_size * scale_from)  # Keep original scale
-            
-            # Draw first answer (color changed)
-            self._draw_base_shape(draw, shape_d, question1_pos[0], question1_pos[1], current_size, current_color)
-            
-            # Keep second question mark
-            self._draw_question_mark(draw, question2_pos)
-            
-            frames.append(img)
-        
-        # Step 2: Reveal second ? (scale change)
-        for i in range(step_frames):
-            img = self._render_static_elements(task_data, base_shape_size, step_width, arrow_offset, margin, width, height)
-            draw = ImageDraw.Draw(img)
-            
-            # First answer is now complete (color changed)
-            first_answer_size = int(base_shape_size * scale_from)
-            self._draw_base_shape(draw, shape_d, question1_pos[0], question1_pos[1], first_answer_size, color_to)
-            
-            # Interpolate scale for second question mark
-            progress = i / (step_frames - 1) if step_frames > 1 else 1.0
-            current_scale = scale_from + (scale_to - scale_from) * progress
-            current_size = int(base_shape_size * current_scale)
-            
-            # Draw second answer (color + scale changed)
-            self._draw_base_shape(draw, shape_d, question2_pos[0], question2_pos[1], current_size, color_to)
-            
-            frames.append(img)
+        # Positions of the question marks that will be revealed
+        question1_pos = self._positions_bottom["E"]
+        question2_pos = self._positions_bottom["F"]
+        
+        shape_d = task_data.shape_d
+        color_from = task_data.rgb_from
+        color_to = task_data.rgb_to
+        scale_from = self.scale_factors[task_data.scale_from]
+        scale_to = self.scale_factors[task_data.scale_to]
+        
+        # Interpolation tables for both steps, computed once per animation and
+        # converted to plain Python colors / pixel sizes for the draw calls
+        color_table, size_table = _build_frame_params(color_from, color_to, scale_from, scale_to, base_shape_size, step_frames)
+        frame_colors = [tuple(rgb) for rgb in color_table.tolist()]
+        frame_sizes = size_table.tolist()
+        
+        # Everything except the revealed answer is identical across each step,
+        # so each step starts from its own background buffer
+        static_bg = self._render_static_elements(task_data)
+        color_step_bg = static_bg.copy()
+        self._draw_question_mark(color_step_bg, question2_pos)  # Second ? stays during step 1
+        color_step_bg = self._to_frame_array(color_step_bg, channel_order)
+        scale_step_bg = static_bg
+        self._draw_shape_at_position(scale_step_bg, shape_d, question1_pos, task_data.size_from, color_to)  # First answer is complete in step 2
+        scale_step_bg = self._to_frame_array(scale_step_bg, channel_order)
+        
+        # One (background, position, size, color) spec per frame: step 1 recolors
+        # the first answer at the original scale, step 2 grows the second answer
+        # in the final color
+        backgrounds = (color_step_bg, scale_step_bg)
+        frame_specs = (
+            [(0, question1_pos, task_data.size_from, color) for color in frame_colors] +
+            [(1, question2_pos, size, color_to) for size in frame_sizes]
+        )
         
-        return frames
+        # A spec equal to the previous one (colors such as red/crimson share an
+        # RGB value, and the integer sizes repeat) re-yields the same array, so
+        # the frame is rendered and encoded once
+        frame = previous_spec = None
+        for spec in frame_specs:
+            if spec != previous_spec:
+                step, (x, y), size, color = spec
+                frame = backgrounds[step].copy()
+                self._stamp_shape_array(frame, shape_d, x, y, size, color, channel_order)
+                previous_spec = spec
+            yield frame
     
-    def _render_static_elements(self, task_data: Dict[str, Any], base_shape_size: int, step_width: int, arrow_offset: int, margin: int, width: int, height: int) -> Image.Image:
+    def _render_static_elements(self, task_data: TwoStepTaskData) -> Image.Image:
         """Render the static elements that don't change during animation."""
-        img = self.renderer.create_blank_image()
+        img = self._blank_template.copy()
         draw = ImageDraw.Draw(img)
         
-        # Use same improved spacing as other rendering functions
-        total_content_width = width - 2 * margin
-        step_width = total_content_width // 3
-        shape_spacing = step_width * 0.8
-        arrow_width = step_width * 0.2
-        
-        positions = {
-            # Example row (top) - these never change
-            "A": (margin + shape_spacing//2, height//3),
-            "arrow1": (margin + shape_spacing + arrow_width//2, height//3),
-            "B": (margin + shape_spacing + arrow_width + shape_spacing//2, height//3),
-            "arrow2": (margin + 2*shape_spacing + arrow_width + arrow_width//2, height//3),
-            "C": (margin + 2*shape_spacing + 2*arrow_width + shape_spacing//2, height//3),
-            
-            # Question row (bottom) - D and arrows are static
-            "D": (margin + shape_spacing//2, 2*height//3),
-            "arrow3": (margin + shape_spacing + arrow_width//2, 2*height//3),
-            "arrow4": (margin + 2*shape_spacing + arrow_width + arrow_width//2, 2*height//3),
-        }
+        # Example row (top) - these never change
+        top = self._positions_top
+        # Question row (bottom) - D and arrows are static
+        bottom = self._positions_bottom
         
         # Draw static example sequence: A → B → C
-        self._draw_shape_at_position(draw, task_data["shape_a"], positions["A"], base_shape_size, 
-                                   task_data["color_from"], task_data["scale_from"])
-        self._draw_arrow(draw, positions["arrow1"])
-        self._draw_shape_at_position(draw, task_data["shape_b"], positions["B"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_from"])
-        self._draw_arrow(draw, positions["arrow2"])
-        self._draw_shape_at_position(draw, task_data["shape_c"], positions["C"], base_shape_size, 
-                                   task_data["color_to"], task_data["scale_to"])
+        self._draw_shape_at_position(img, task_data.shape_a, top["A"], task_data.size_from, task_data.rgb_from)
+        self._draw_arrow(draw, top["arrow1"])
+        self._draw_shape_at_position(img, task_data.shape_b, top["B"], task_data.size_from, task_data.rgb_to)
+        self._draw_arrow(draw, top["arrow2"])
+        self._draw_shape_at_position(img, task_data.shape_c, top["C"], task_data.size_to, task_data.rgb_to)
         
         # Draw static question elements: D and arrows
-        self._draw_shape_at_position(draw, task_data["shape_d"], positions["D"], base_shape_size, 
-                                   task_data["color_from"], task_data["scale_from"])
-        self._draw_arrow(draw, positions["arrow3"])
-        self._draw_arrow(draw, positions["arrow4"])
+        self._draw_shape_at_position(img, task_data.shape_d, bottom["D"], task_data.size_from, task_data.rgb_from)
+        self._draw_arrow(draw, bottom["arrow3"])
+        self._draw_arrow(draw, bottom["arrow4"])
         
         return img